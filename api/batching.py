@@ -0,0 +1,149 @@
+"""
+Server-side micro-batching for prediction requests.
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Batching configuration, overridable through the environment. With MAX_LATENCY_MS=0 a
+# batch is dispatched as soon as the queue is empty, so it only holds the requests that
+# piled up during the previous model call and a lone request is not delayed.
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "32"))
+MAX_LATENCY_MS = float(os.getenv("MAX_LATENCY_MS", "0"))
+MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", "1024"))
+
+BatchPredictFn = Callable[[List[dict]], List[Tuple[int, Optional[float]]]]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests into batches.
+    A background task drains the queue and runs one batched
+    model call per batch in a worker thread.
+    """
+
+    def __init__(
+        self,
+        predict_batch: BatchPredictFn,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_latency_ms: float = MAX_LATENCY_MS,
+        max_queue_size: int = MAX_QUEUE_SIZE
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            predict_batch: Callable mapping a list of inputs to a list of (prediction, probability)
+            max_batch_size: Maximum number of requests per model call
+            max_latency_ms: Maximum time to wait for a batch to fill up (0 = do not wait)
+            max_queue_size: Maximum number of queued requests before callers wait
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_latency = max_latency_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Create the queue and start the background batching loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Micro-batching started (max_batch_size={self.max_batch_size}, "
+            f"max_latency_ms={self.max_latency * 1000.0})"
+        )
+
+    async def stop(self):
+        """Stop the batching loop and cancel requests still queued or in flight."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+    async def submit(self, input_data: dict) -> Tuple[int, Optional[float]]:
+        """
+        Queue a single input and wait for its prediction.
+
+        Args:
+            input_data: Dictionary containing the input features
+
+        Returns:
+            Tuple of (prediction, probability)
+        """
+        if self._task is None:
+            raise RuntimeError("Micro-batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((input_data, future))
+        return await future
+
+    async def _run(self):
+        """
+        Background loop: take up to max_batch_size queued items, waiting at most
+        max_latency for more once the queue is empty.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_latency
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting on the clock
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._process(batch)
+            finally:
+                # stop() can cancel this task while the batch is in the threadpool; these
+                # futures have already left the queue, so cancel them here or callers hang
+                for _, future in batch:
+                    if not future.done():
+                        future.cancel()
+
+    async def _process(self, batch: list):
+        """Run the model on a batch off the event loop and resolve each future."""
+        rows = [input_data for input_data, _ in batch]
+
+        try:
+            results = await run_in_threadpool(self.predict_batch, rows)
+        except Exception as e:
+            if len(batch) == 1:
+                _set_exception(batch[0][1], e)
+                return
+            # One bad input must not fail the whole batch; retry each row on its own
+            logger.warning(f"Batch of {len(batch)} failed ({str(e)}), retrying row by row")
+            for item in batch:
+                await self._process([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: Exception):
+    """Set an exception on a future unless the caller already gave up on it."""
+    if not future.done():
+        future.set_exception(exc)
@@ -0,0 +1,79 @@
+"""
+Convert the trained model pipeline into a compact serving artifact.
+
+The artifact is a .npz holding only what inference needs: the BoxCox lambda,
+the Light bin edges, the hour sin/cos tables and the LightGBM booster as text,
+plus the name and SHA-256 of the source pipeline. The predictor refuses to load
+it when the .joblib next to it no longer matches, e.g. after retraining.
+OccupancyPredictor loads it without unpickling the sklearn/imblearn pipeline.
+scikit-learn is still installed: lightgbm imports it when available, and
+MODEL_PATH can point back at the .joblib pipeline.
+
+Usage (from the repository root):
+    python api/export_model.py --input ./models/occupancy_model_pipeline.joblib \
+                               --output ./models/occupancy_model.npz
+"""
+import argparse
+import os
+from pathlib import Path
+
+# Skip native compilation; the predictors below are only used to check the export
+os.environ.setdefault("COMPILE_MODEL", "0")
+
+import numpy as np
+
+from model import OccupancyPredictor, file_sha256
+
+
+def export_compact(input_path: str, output_path: str):
+    """
+    Write the compact artifact for a saved pipeline.
+
+    Args:
+        input_path: Path to the joblib pipeline
+        output_path: Path of the .npz file to write
+    """
+    from transformers import TransformCO2, DiscretizeLight
+
+    pipeline = OccupancyPredictor(input_path)
+    if pipeline._booster is None:
+        raise ValueError("Pipeline layout is not supported by the compact format")
+
+    steps = [step for _, step in pipeline.model.steps]
+    co2 = next(s for s in steps if isinstance(s, TransformCO2))
+    light = next(s for s in steps if isinstance(s, DiscretizeLight))
+
+    np.savez_compressed(
+        output_path,
+        boxcox_lambda=np.float64(co2.lambda_),
+        bin_edges=light.discretizer.bin_edges_[0],
+        hour_sin=pipeline._hour_sin,
+        hour_cos=pipeline._hour_cos,
+        booster_txt=np.array(pipeline._booster.model_to_string()),
+        # Lets the loader detect a pipeline retrained after this export
+        source_name=np.array(Path(input_path).name),
+        source_sha256=np.array(file_sha256(input_path))
+    )
+
+    # Both artifacts must give identical predictions
+    compact = OccupancyPredictor(output_path)
+    sample = {
+        "datetime": "2015-02-04 17:51:00",
+        "Temperature": 23.18,
+        "Humidity": 27.272,
+        "Light": 426.0,
+        "CO2": 721.25,
+        "HumidityRatio": 0.00479
+    }
+    if compact.predict(sample) != pipeline.predict(sample):
+        raise RuntimeError("Compact artifact predictions differ from the pipeline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the model pipeline as a compact artifact")
+    parser.add_argument("--input", default="./models/occupancy_model_pipeline.joblib")
+    parser.add_argument("--output", default="./models/occupancy_model.npz")
+    args = parser.parse_args()
+
+    export_compact(args.input, args.output)
+    print(f"Compact model written to: {args.output}")
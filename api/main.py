@@ -1,15 +1,27 @@
 """
 FastAPI application for Occupancy Prediction Service.
 """
-from fastapi import FastAPI, HTTPException, status
+import os
+
+# One OpenMP thread per worker process; must be set before NumPy/LightGBM are imported
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 import logging
 import time
 from contextlib import asynccontextmanager
 
-from schemas import OccupancyInput, OccupancyPrediction, HealthResponse
+import anyio.to_thread
+import pandas as pd
+from typing import List
+
+from schemas import OccupancyInput, BatchOccupancyInput, OccupancyPrediction, HealthResponse
 from model import get_predictor
+from batching import MicroBatcher, MAX_BATCH_SIZE
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +30,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Worker threads available for model calls (anyio default is 40)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Sample input used to exercise the inference paths at startup
+WARMUP_SAMPLE = {
+    "datetime": "2015-02-04 17:51:00",
+    "Temperature": 23.0,
+    "Humidity": 27.0,
+    "Light": 426.0,
+    "CO2": 721.0,
+    "HumidityRatio": 0.00479
+}
+WARMUP_ITERATIONS = 5
+
+# Human-readable label for each predicted class
+LABELS = ("Person not present", "Person present")
+
 
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
@@ -28,14 +57,34 @@ async def lifespan(app: FastAPI):
     try:
         predictor = get_predictor()
         logger.info("Model loaded successfully")
+        
+        # Pay one-time costs (lazy imports, LightGBM/pandas first calls) before serving
+        for _ in range(WARMUP_ITERATIONS):
+            predictor.predict(WARMUP_SAMPLE)
+            predictor.predict_batch([WARMUP_SAMPLE, WARMUP_SAMPLE])
+        logger.info("Model warmed up")
     except Exception as e:
         logger.error(f"Failed to load model: {str(e)}")
         raise
     
+    # Endpoints read the loaded predictor from app state instead of calling get_predictor()
+    app.state.predictor = predictor
+    
+    # Size the threadpool that runs the CPU-bound model calls
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
+    # Start the micro-batcher that groups concurrent /predict calls (MAX_BATCH_SIZE=1 disables it)
+    app.state.batcher = None
+    if MAX_BATCH_SIZE > 1:
+        app.state.batcher = MicroBatcher(predictor.predict_batch)
+        await app.state.batcher.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down the application...")
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
 
 
 # Initialize FastAPI app
@@ -43,7 +92,8 @@ app = FastAPI(
     title="Occupancy Prediction API",
     description="Microservice for predicting room occupancy based on environmental sensors",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -64,6 +114,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "predict": "/predict",
+            "predict_batch": "/predict_batch",
             "health": "/health",
             "docs": "/docs",
             "model_info": "/model/info"
@@ -72,13 +123,13 @@ async def root():
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint.
     Returns the status of the service and model.
     """
     try:
-        predictor = get_predictor()
+        predictor = request.app.state.predictor
         model_loaded = predictor.is_loaded()
         
         return HealthResponse(
@@ -94,8 +145,13 @@ async def health_check():
         )
 
 
-@app.post("/predict", response_model=OccupancyPrediction, tags=["Prediction"])
-async def predict_occupancy(input_data: OccupancyInput):
+@app.post(
+    "/predict",
+    response_model=OccupancyPrediction,
+    response_model_exclude_none=True,
+    tags=["Prediction"]
+)
+async def predict_occupancy(input_data: OccupancyInput, request: Request):
     """
     Predict room occupancy based on sensor data.
     
@@ -108,7 +164,7 @@ async def predict_occupancy(input_data: OccupancyInput):
     try:
         start = time.perf_counter()
         # Get predictor instance
-        predictor = get_predictor()
+        predictor = request.app.state.predictor
         
         # Convert Pydantic model to dict
         data_dict = input_data.model_dump()
@@ -116,18 +172,23 @@ async def predict_occupancy(input_data: OccupancyInput):
         # Validate input
         predictor.validate_input(data_dict)
         
-        # Make prediction
-        prediction, probability = predictor.predict(data_dict)
+        # Make prediction off the event loop, batched with other concurrent requests if enabled
+        batcher = request.app.state.batcher
+        if batcher is not None:
+            prediction, probability = await batcher.submit(data_dict)
+        else:
+            prediction, probability = await run_in_threadpool(predictor.predict, data_dict)
 
-        # Map numeric prediction to human-readable label
-        label = "Person present" if prediction == 1 else "Person not present"
+        label = LABELS[prediction]
         
         logger.info(f"Prediction made: {label} (raw={prediction}) with probability {probability}")
         
         handling_time_ms = (time.perf_counter() - start) * 1000.0
 
-        return OccupancyPrediction(
-            prediction=label,
+        # Fields come straight from the model, so skip input validation on the response object
+        return OccupancyPrediction.model_construct(
+            prediction=prediction,
+            label=label,
             probability=probability,
             handling_time_ms=handling_time_ms
         )
@@ -146,13 +207,70 @@ async def predict_occupancy(input_data: OccupancyInput):
         )
 
 
+def _predict_items(predictor, items: List[OccupancyInput]):
+    """Build the DataFrame for a batch request and score it (runs in a worker thread)."""
+    df = pd.DataFrame([item.model_dump() for item in items])
+    return predictor.predict_df(df)
+
+
+@app.post(
+    "/predict_batch",
+    response_model=List[OccupancyPrediction],
+    response_model_exclude_none=True,
+    tags=["Prediction"]
+)
+async def predict_occupancy_batch(input_data: BatchOccupancyInput, request: Request):
+    """
+    Predict room occupancy for several sensor readings in one request.
+    
+    Args:
+        input_data: List of sensor readings, each scored independently
+        
+    Returns:
+        Prediction results in the same order as the inputs
+    """
+    try:
+        start = time.perf_counter()
+        predictor = request.app.state.predictor
+        
+        # One DataFrame and one model call for the whole batch, both off the event loop
+        results = await run_in_threadpool(_predict_items, predictor, input_data.items)
+        
+        logger.info(f"Batch prediction made for {len(results)} inputs")
+        
+        handling_time_ms = (time.perf_counter() - start) * 1000.0
+
+        return [
+            OccupancyPrediction.model_construct(
+                prediction=prediction,
+                label=LABELS[prediction],
+                probability=probability,
+                handling_time_ms=handling_time_ms
+            )
+            for prediction, probability in results
+        ]
+        
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during prediction"
+        )
+
+
 @app.get("/model/info", tags=["Model"])
-async def model_info():
+async def model_info(request: Request):
     """
     Get information about the loaded model.
     """
     try:
-        predictor = get_predictor()
+        predictor = request.app.state.predictor
         
         if not predictor.is_loaded():
             raise HTTPException(
@@ -184,4 +302,12 @@ async def model_info():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Several single-threaded workers scale better than one worker for this CPU-bound service
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("UVICORN_WORKERS", "4")),
+        loop="uvloop",
+        http="httptools"
+    )
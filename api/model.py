@@ -1,18 +1,51 @@
 """
 Model loading and inference module.
 """
-import joblib
+import hashlib
+import math
+import os
 import pandas as pd
 import numpy as np
+import lightgbm as lgb
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
 import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from scipy.special import boxcox
 
-# Import transformers BEFORE loading the model so joblib can find the classes; else class not found error
-from transformers import TransformCO2, DiscretizeLight, FeatureEngineer
+from compiled import compile_booster
 
 logger = logging.getLogger(__name__)
 
+# Threads per LightGBM predict call; workers are scaled out as processes instead
+NUM_THREADS = int(os.getenv("OMP_NUM_THREADS", "1"))
+
+# Model artifact to serve: a joblib pipeline, or a compact .npz written by export_model.py
+MODEL_PATH = os.getenv("MODEL_PATH", "./models/occupancy_model_pipeline.joblib")
+
+# Lag-based features produced by engineer_features. Batched rows are independent
+# requests, so these are zeroed to match what a single-row prediction sees.
+TEMPORAL_FEATURES = [
+    "co2_delta", "light_delta", "hr_delta", "temp_delta",
+    "co2_rate", "light_rate", "hr_rate", "temp_rate",
+]
+
+# Feature order expected by the classifier (output of the preprocessing steps)
+FEATURE_NAMES = [
+    "Temperature", "Humidity", "Light", "CO2", "HumidityRatio",
+    "hour", "day_of_week", "hour_sin", "hour_cos",
+] + TEMPORAL_FEATURES
+
+# Numeric input columns, as sent by clients and expected by the pipeline
+INPUT_FEATURES = FEATURE_NAMES[:5]
+
+# Timestamp format of the datetime input field
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIMESTAMP_MIN = pd.Timestamp.min.to_pydatetime(warn=False)
+TIMESTAMP_MAX = pd.Timestamp.max.to_pydatetime(warn=False)
+
 
 class OccupancyPredictor:
     """
@@ -25,24 +58,166 @@ class OccupancyPredictor:
         Initialize the predictor with the model path.
         
         Args:
-            model_path: Path to the saved model pipeline
+            model_path: Path to the saved model pipeline (.joblib) or compact artifact (.npz)
         """
         self.model_path = Path(model_path)
         self.model = None
+        self._transforms = []
+        self._classifier = None
+        self._predict_proba = None
+        self._booster = None
+        self._fast_booster = None
+        self._scratch_df = None
+        self._scratch_lock = threading.Lock()
         self._load_model()
     
     def _load_model(self):
-        """Load the trained model pipeline from disk."""
+        """Load the trained model from disk."""
         try:
             if not self.model_path.exists():
                 raise FileNotFoundError(f"Model file not found at {self.model_path}")
             
-            self.model = joblib.load(self.model_path)
+            if self.model_path.suffix == ".npz":
+                self._load_compact()
+            else:
+                self._load_pipeline()
             logger.info(f"Model successfully loaded from {self.model_path}")
+            
+            if self._booster is not None:
+                # Native build of the same trees; the LightGBM booster stays as fallback
+                self._fast_booster = compile_booster(self._booster)
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def _load_pipeline(self):
+        """Load the full sklearn/imblearn pipeline saved by the training notebook."""
+        import joblib
+        # Import transformers BEFORE loading the model so joblib can find the classes; else class not found error
+        import transformers  # noqa: F401
+        
+        self.model = joblib.load(self.model_path)
+        self._init_preprocess()
+        self._init_fast_path()
+        
+        # Single-row frame reused by predict() instead of building a DataFrame per request
+        self._scratch_df = pd.DataFrame(
+            {"datetime": pd.Series([pd.Timestamp(0)])}
+            | {col: np.zeros(1, dtype=np.float64) for col in INPUT_FEATURES}
+        )
+    
+    def _load_compact(self):
+        """
+        Load a compact artifact written by export_model.py.
+        Holds only the fitted constants and the booster, so no sklearn pipeline is unpickled.
+        """
+        artifact = np.load(self.model_path, allow_pickle=False)
+        self._check_compact_source(artifact)
+        booster = lgb.Booster(model_str=str(artifact["booster_txt"]))
+        if booster.feature_name() != FEATURE_NAMES:
+            raise ValueError(f"Unexpected model features: {booster.feature_name()}")
+        
+        self._co2_lambda = float(artifact["boxcox_lambda"])
+        # Inner edges only, as KBinsDiscretizer does for ordinal encoding
+        self._light_edges = artifact["bin_edges"][1:-1]
+        self._hour_sin = artifact["hour_sin"]
+        self._hour_cos = artifact["hour_cos"]
+        self._booster = booster
+        self.model = booster
+    
+    def _check_compact_source(self, artifact):
+        """
+        Refuse a compact artifact that is older than the pipeline it was exported from.
+        Retraining overwrites the .joblib next to it, and the .npz would otherwise keep
+        serving the previous model until export_model.py is run again.
+        """
+        if "source_sha256" not in artifact.files:
+            logger.warning(f"{self.model_path} does not record its source pipeline; staleness not checked")
+            return
+        
+        source = self.model_path.with_name(str(artifact["source_name"]))
+        if source.exists() and file_sha256(source) != str(artifact["source_sha256"]):
+            raise ValueError(
+                f"{self.model_path} was exported from a different {source.name}; "
+                f"rerun export_model.py or set MODEL_PATH to the .joblib pipeline"
+            )
+    
+    def _init_preprocess(self):
+        """
+        Precompute the chain of preprocessing transforms from the pipeline.
+        Samplers (SMOTE) only apply during fit and the final step is the classifier,
+        so both are left out.
+        """
+        from transformers import TransformCO2, DiscretizeLight, FeatureEngineer
+        
+        self._transforms = []
+        for _, step in self.model.steps[:-1]:
+            if not hasattr(step, "transform"):
+                continue
+            if isinstance(step, (TransformCO2, DiscretizeLight, FeatureEngineer)):
+                # Callers always pass a freshly built frame, so mutate it instead of copying
+                step.copy = False
+            self._transforms.append(step.transform)
+        
+        self._classifier = self.model.steps[-1][1]
+        if "n_jobs" in self._classifier.get_params():
+            # Keep the pipeline fallback from spawning a thread per core in every worker
+            self._classifier.set_params(n_jobs=NUM_THREADS)
+        # predict_proba gives both the class and its probability in one call
+        self._predict_proba = getattr(self._classifier, "predict_proba", None)
+    
+    def _preprocess(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Run the raw input frame through the preprocessing steps (modifies df)."""
+        for transform in self._transforms:
+            df = transform(df)
+        return df
+    
+    def _classify(self, features: pd.DataFrame) -> List[Tuple[int, Optional[float]]]:
+        """Classify preprocessed features with the pipeline's final estimator."""
+        if self._predict_proba is None:
+            # If model doesn't support predict_proba
+            return [(int(c), None) for c in self._classifier.predict(features)]
+        
+        probabilities = self._predict_proba(features)
+        predictions = np.argmax(probabilities, axis=1)
+        return [(int(c), float(p[c])) for p, c in zip(probabilities, predictions)]
+    
+    def _init_fast_path(self):
+        """
+        Cache the fitted constants needed to predict a single row without pandas.
+        Falls back to the full pipeline if the model does not have the expected steps.
+        """
+        from transformers import TransformCO2, DiscretizeLight, FeatureEngineer, HOUR_SIN, HOUR_COS
+        
+        steps = dict(self.model.steps)
+        co2 = next((s for s in steps.values() if isinstance(s, TransformCO2)), None)
+        light = next((s for s in steps.values() if isinstance(s, DiscretizeLight)), None)
+        has_features = any(isinstance(s, FeatureEngineer) for s in steps.values())
+        classifier = self._classifier
+        booster = getattr(classifier, "booster_", None)
+        
+        if (
+            co2 is None or light is None or not has_features or booster is None
+            or light.discretizer.encode != "ordinal"
+            or list(getattr(classifier, "classes_", [])) != [0, 1]
+            or booster.feature_name() != FEATURE_NAMES
+        ):
+            logger.warning("Model pipeline has an unexpected layout; single-row fast path disabled")
+            return
+        
+        self._co2_lambda = co2.lambda_
+        # Inner edges only, as KBinsDiscretizer does for ordinal encoding
+        self._light_edges = light.discretizer.bin_edges_[0][1:-1]
+        self._hour_sin = HOUR_SIN
+        self._hour_cos = HOUR_COS
+        self._booster = booster
+    
+    def _predict_positive(self, features: np.ndarray) -> np.ndarray:
+        """Positive class probabilities for already preprocessed features."""
+        if self._fast_booster is not None:
+            return self._fast_booster.predict(features)
+        return self._booster.predict(features, num_threads=NUM_THREADS)
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded."""
         return self.model is not None
@@ -60,31 +235,180 @@ class OccupancyPredictor:
         if not self.is_loaded():
             raise RuntimeError("Model is not loaded")
         
+        if self._booster is not None:
+            return self.predict_single(input_data)
+        
         try:
-            # Convert input to DataFrame
-            # The model expects columns: Temperature, Humidity, Light, CO2, HumidityRatio, datetime
-            df = pd.DataFrame([input_data])
+            timestamp = pd.Timestamp(_parse_datetime(input_data["datetime"]))
             
-            # Convert datetime string to datetime object
-            df["datetime"] = pd.to_datetime(df["datetime"], format="%Y-%m-%d %H:%M:%S")
+            # The transforms rewrite the scratch frame's columns, and threadpool
+            # workers share this instance, so hold it for the whole call
+            with self._scratch_lock:
+                # Overwrite the values through iat, which also works under copy-on-write;
+                # the model expects columns: datetime, Temperature, Humidity, Light, CO2, HumidityRatio
+                df = self._scratch_df
+                df.iat[0, 0] = timestamp
+                for position, col in enumerate(INPUT_FEATURES, start=1):
+                    df.iat[0, position] = input_data[col]
+                
+                # Preprocess once, then classify
+                features = self._preprocess(df)
+                return self._classify(features)[0]
             
-            # Make prediction
-            prediction = self.model.predict(df)[0]
+        except Exception as e:
+            logger.error(f"Error during prediction: {str(e)}")
+            raise
+    
+    def _build_features(self, rows: List[dict]) -> np.ndarray:
+        """
+        Compute the classifier features for independent inputs with NumPy only.
+        Matches the pipeline's preprocessing for rows without a previous reading.
+        """
+        # Deltas and rates stay 0: each row is its own series (no previous reading)
+        features = np.zeros((len(rows), len(FEATURE_NAMES)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            timestamp = _parse_datetime(row["datetime"])
+            features[i, :7] = (
+                row["Temperature"], row["Humidity"], row["Light"], row["CO2"],
+                row["HumidityRatio"], timestamp.hour, timestamp.weekday()
+            )
+        return self._transform_features(features)
+    
+    def _frame_features(self, df: pd.DataFrame) -> np.ndarray:
+        """Column-wise version of _build_features for a DataFrame of raw inputs."""
+        timestamps = [_parse_datetime(value) for value in df["datetime"]]
+        features = np.zeros((len(df), len(FEATURE_NAMES)), dtype=np.float64)
+        features[:, :5] = df[INPUT_FEATURES].to_numpy(dtype=np.float64)
+        features[:, 5] = [timestamp.hour for timestamp in timestamps]
+        features[:, 6] = [timestamp.weekday() for timestamp in timestamps]
+        return self._transform_features(features)
+    
+    def _transform_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Apply the CO2, Light and hour transforms in place on raw feature rows.
+        Missing and invalid values are handled as the pipeline handles them.
+        """
+        light = features[:, 2]
+        if not np.isfinite(light).all():
+            # KBinsDiscretizer rejects these in the pipeline
+            raise ValueError("Light must be a finite number.")
+        features[:, 2] = np.searchsorted(self._light_edges, light, side="right")
+        # CO2 <= 0 gives NaN/-inf like the pipeline's BoxCox
+        features[:, 3] = boxcox(features[:, 3], self._co2_lambda)
+        
+        hours = features[:, 5].astype(np.intp)
+        features[:, 7] = self._hour_sin[hours]
+        features[:, 8] = self._hour_cos[hours]
+        
+        # The pipeline zero-fills NaN (missing readings, BoxCox of negative CO2)
+        features[np.isnan(features)] = 0.0
+        return features
+    
+    def predict_single(self, input_data: dict) -> Tuple[int, float]:
+        """
+        Make a prediction on one input without building a DataFrame.
+        Computes the same features as the pipeline directly with NumPy and
+        scores them with the LightGBM booster.
+        
+        Args:
+            input_data: Dictionary containing the input features
             
-            # Get prediction probabilities
-            try:
-                probabilities = self.model.predict_proba(df)[0]
-                probability = float(probabilities[prediction])
-            except AttributeError:
-                # If model doesn't support predict_proba
-                probability = None
+        Returns:
+            Tuple of (prediction, probability)
+        """
+        try:
+            light = float(input_data["Light"])
+            if not math.isfinite(light):
+                # KBinsDiscretizer rejects these in the pipeline
+                raise ValueError("Light must be a finite number.")
             
-            return int(prediction), probability
+            timestamp = _parse_datetime(input_data["datetime"])
+            hour = timestamp.hour
+            
+            # Scalar version of _build_features; avoids its array setup on the hot path
+            features = np.array([[
+                input_data["Temperature"],
+                input_data["Humidity"],
+                np.searchsorted(self._light_edges, light, side="right"),
+                # CO2 <= 0 gives NaN/-inf like the pipeline's BoxCox
+                boxcox(input_data["CO2"], self._co2_lambda),
+                input_data["HumidityRatio"],
+                hour,
+                timestamp.weekday(),
+                self._hour_sin[hour],
+                self._hour_cos[hour],
+                # Deltas and rates are always 0 for a single row (no previous reading)
+                0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+            ]], dtype=np.float64)
+            # The pipeline zero-fills NaN (missing readings, BoxCox of negative CO2)
+            features[np.isnan(features)] = 0.0
+            
+            return _to_prediction(self._predict_positive(features)[0])
             
         except Exception as e:
             logger.error(f"Error during prediction: {str(e)}")
             raise
     
+    def predict_batch(self, rows: List[dict]) -> List[Tuple[int, Optional[float]]]:
+        """
+        Make predictions for several independent inputs with one model call.
+        
+        Args:
+            rows: List of dictionaries containing the input features
+            
+        Returns:
+            List of (prediction, probability) tuples, in input order
+        """
+        if not self.is_loaded():
+            raise RuntimeError("Model is not loaded")
+        
+        if len(rows) == 1 and self._booster is not None:
+            return [self.predict_single(rows[0])]
+        
+        if self._booster is None:
+            return self.predict_df(pd.DataFrame(rows))
+        
+        try:
+            positive = self._predict_positive(self._build_features(rows))
+            return [_to_prediction(p) for p in positive]
+            
+        except Exception as e:
+            logger.error(f"Error during batch prediction: {str(e)}")
+            raise
+    
+    def predict_df(self, df: pd.DataFrame) -> List[Tuple[int, Optional[float]]]:
+        """
+        Make predictions for a DataFrame of independent inputs in one pass.
+        
+        Args:
+            df: DataFrame with one row per input and the raw input columns
+                (modified in place when the full pipeline is used)
+            
+        Returns:
+            List of (prediction, probability) tuples, in row order
+        """
+        if not self.is_loaded():
+            raise RuntimeError("Model is not loaded")
+        
+        try:
+            if self._booster is not None:
+                positive = self._predict_positive(self._frame_features(df))
+                return [_to_prediction(p) for p in positive]
+            
+            # Same parser as the single-row paths, so both accept the same inputs
+            df["datetime"] = pd.to_datetime([_parse_datetime(value) for value in df["datetime"]])
+            
+            df = self._preprocess(df)
+            
+            # Rows are unrelated requests, not a time series
+            df[TEMPORAL_FEATURES] = 0.0
+            
+            return self._classify(df)
+            
+        except Exception as e:
+            logger.error(f"Error during batch prediction: {str(e)}")
+            raise
+    
     def validate_input(self, input_data: dict) -> bool:
         """
         Validate that input data contains all required features.
@@ -104,6 +428,53 @@ class OccupancyPredictor:
         return True
 
 
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 digest of a file, used to tie a compact artifact to its source pipeline."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    Parse a timestamp in DATETIME_FORMAT, accepting the same strings as
+    pd.to_datetime(..., format=DATETIME_FORMAT).
+    The zero-padded 'YYYY-MM-DD HH:MM:SS' layout goes through the C-level
+    fromisoformat, which is far cheaper than pd.to_datetime for a single value;
+    anything else (e.g. '2015-2-4 7:51:00') is left to strptime.
+    """
+    timestamp = None
+    if (
+        len(value) == 19
+        and value[4] == "-" and value[7] == "-" and value[10] == " "
+        and value[13] == ":" and value[16] == ":"
+    ):
+        try:
+            timestamp = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    if timestamp is None:
+        # time.strptime allows seconds up to 61, which pandas rolls over into the next minute
+        parsed = time.strptime(value, DATETIME_FORMAT)
+        timestamp = datetime(*parsed[:5]) + timedelta(seconds=parsed.tm_sec)
+    
+    # pandas stores timestamps as datetime64[ns], which bounds the valid range
+    if not TIMESTAMP_MIN <= timestamp <= TIMESTAMP_MAX:
+        raise ValueError(f"Out of bounds nanosecond timestamp: {value}")
+    return timestamp
+
+
+def _to_prediction(positive: float) -> Tuple[int, float]:
+    """Map a positive class probability to (prediction, probability) like LGBMClassifier.predict."""
+    positive = float(positive)
+    # argmax of [1 - p, p]; ties go to class 0
+    if positive > 1.0 - positive:
+        return 1, positive
+    return 0, 1.0 - positive
+
+
 # Global predictor instance
 predictor = None
 
@@ -115,5 +486,5 @@ def get_predictor() -> OccupancyPredictor:
     """
     global predictor
     if predictor is None:
-        predictor = OccupancyPredictor()
+        predictor = OccupancyPredictor(MODEL_PATH)
     return predictor
@@ -1,9 +1,13 @@
 """
 Pydantic schemas for API request and response validation.
 """
+import os
+
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+
+# Largest number of inputs accepted in one /predict_batch request
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "1000"))
 
 
 class OccupancyInput(BaseModel):
@@ -53,12 +57,27 @@ class OccupancyInput(BaseModel):
         }
 
 
+class BatchOccupancyInput(BaseModel):
+    """Input schema for a batch of occupancy prediction requests."""
+    
+    items: List[OccupancyInput] = Field(
+        ...,
+        description="Sensor readings to predict, scored independently",
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS
+    )
+
+
 class OccupancyPrediction(BaseModel):
     """Output schema for occupancy prediction response."""
     
-    prediction: str = Field(
+    prediction: int = Field(
+        ...,
+        description="Predicted occupancy (1 = occupied, 0 = not occupied)"
+    )
+    label: str = Field(
         ...,
-        description="Predicted occupancy label (Person present / Person not present)"
+        description="Human-readable label (Person present / Person not present)"
     )
     probability: Optional[float] = Field(
         None,
@@ -75,7 +94,8 @@ class OccupancyPrediction(BaseModel):
     class Config:
         json_schema_extra = {
             "example": {
-                "prediction": "Person present",
+                "prediction": 1,
+                "label": "Person present",
                 "probability": 0.95,
                 "handling_time_ms": 12.4
             }
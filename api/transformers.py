@@ -7,6 +7,17 @@ import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 from scipy.stats import boxcox
 
+# Numba is optional: without it the feature kernel runs as plain NumPy. The kernel only
+# runs in training and in the .joblib pipeline fallback; the serving fast path skips it.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Cyclical encoding of the hour of day, indexed by hour (0-23)
+HOUR_SIN = np.sin(2 * np.pi * np.arange(24) / 24)
+HOUR_COS = np.cos(2 * np.pi * np.arange(24) / 24)
+
 
 def transform_co2(data, *, trained_lambda=None):
     """Transform CO2 using BoxCox to fit the best Normal curve possible."""
@@ -18,72 +29,163 @@ def transform_co2(data, *, trained_lambda=None):
     return (data, lambda_)
 
 
+# Raw sensor columns, zero-filled by engineer_features when a reading is missing
+_SENSOR_COLUMNS = ["Temperature", "Humidity", "Light", "CO2", "HumidityRatio"]
+
+# Derived columns produced by _engineer_kernel, in output order
+_KERNEL_COLUMNS = [
+    "hour_sin", "hour_cos",
+    "co2_delta", "light_delta", "hr_delta", "temp_delta",
+    "co2_rate", "light_rate", "hr_rate", "temp_rate",
+]
+
+
+def _engineer_kernel(co2, light, hr, temp, hour, dt_minutes):
+    """
+    Numeric core of engineer_features.
+    Returns a (10, n_rows) array with the columns of _KERNEL_COLUMNS.
+    """
+    n = co2.shape[0]
+    out = np.empty((10, n))
+    out[0] = HOUR_SIN[hour]
+    out[1] = HOUR_COS[hour]
+
+    for j, values in enumerate((co2, light, hr, temp)):
+        # Delta (i.e. Lag) feature; 0 for the first row
+        delta = out[2 + j]
+        delta[:1] = 0.0
+        delta[1:] = values[1:] - values[:-1]
+
+        # Rate feature; the first row and zero elapsed time over zero change give NaN -> 0
+        rate = out[6 + j]
+        rate[:] = delta / dt_minutes
+        rate[np.isnan(rate)] = 0.0
+        delta[np.isnan(delta)] = 0.0
+
+    return out
+
+
+if njit is not None:
+    # fastmath is left off: it assumes no NaN/inf, which the rate handling relies on
+    _engineer_kernel = njit(cache=True, error_model="numpy")(_engineer_kernel)
+    # Compile (or load from cache) at import instead of on the first request
+    _engineer_kernel(
+        np.ones(1), np.ones(1), np.ones(1), np.ones(1),
+        np.zeros(1, dtype=np.int32), np.full(1, np.nan)
+    )
+
+
 def engineer_features(data):
     """Adds time series related features like delta, rates to dataframe."""
-    # Time features
-    data['hour'] = data['datetime'].dt.hour
-    data['day_of_week'] = data['datetime'].dt.dayofweek
-    data['hour_sin'] = np.sin(2 * np.pi * data['hour'] / 24)
-    data['hour_cos'] = np.cos(2 * np.pi * data['hour'] / 24)
-
-    # Delta (i.e. Lag) features
-    data["co2_delta"] = data["CO2"] - data["CO2"].shift(1)
-    data["light_delta"] = data["Light"] - data["Light"].shift(1)
-    data["hr_delta"] = data["HumidityRatio"] - data["HumidityRatio"].shift(1)
-    data["temp_delta"] = data["Temperature"] - data["Temperature"].shift(1)
-
-    # Rate features
-    data["co2_rate"] = data["co2_delta"] / (data['datetime'].diff(periods=1).dt.total_seconds()/60)
-    data["light_rate"] = data["light_delta"] / (data['datetime'].diff(periods=1).dt.total_seconds()/60)
-    data["hr_rate"] = data["hr_delta"] / (data['datetime'].diff(periods=1).dt.total_seconds()/60)
-    data["temp_rate"] = data["temp_delta"] / (data['datetime'].diff(periods=1).dt.total_seconds()/60)
+    timestamps = data['datetime']
+    # Minutes elapsed since the previous reading, shared by all rate features
+    dt_minutes = timestamps.diff().dt.total_seconds().to_numpy() / 60
 
+    # Time features
+    hour = timestamps.dt.hour.to_numpy()
+    day_of_week = timestamps.dt.dayofweek.to_numpy()
+    # NaT gives a float NaN hour, which cannot index the sin/cos tables; those rows get
+    # 0 for every time feature, as np.sin(NaN) followed by fillna(0) used to give
+    missing_time = np.isnan(hour) if hour.dtype.kind == "f" else None
+    if missing_time is not None:
+        hour = np.where(missing_time, 0.0, hour)
+        day_of_week = np.where(missing_time, 0.0, day_of_week)
+    features = {
+        'hour': hour,
+        'day_of_week': day_of_week,
+    }
+
+    sensors = {col: data[col].to_numpy(dtype=np.float64) for col in _SENSOR_COLUMNS}
+
+    # Cyclical hour, delta (i.e. Lag) and rate features
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derived = _engineer_kernel(
+            sensors["CO2"],
+            sensors["Light"],
+            sensors["HumidityRatio"],
+            sensors["Temperature"],
+            hour if missing_time is None else hour.astype(np.int32),
+            dt_minutes
+        )
+    if missing_time is not None:
+        derived[:2, missing_time] = 0.0
+    features.update(zip(_KERNEL_COLUMNS, derived))
+
+    # Missing readings become 0 (used to be a blanket fillna(0)); the kernel already
+    # zeroes the deltas and rates computed from them
+    for col, values in sensors.items():
+        missing = np.isnan(values)
+        if missing.any():
+            features[col] = np.where(missing, 0.0, values)
+
+    # Single assign avoids frame fragmentation from repeated column inserts
+    data = data.assign(**features)
     data.drop(columns=["datetime"], inplace=True)
-    data.fillna(0, inplace=True)
 
     return data
 
 
-class TransformCO2(BaseEstimator, TransformerMixin):
-    """Custom transformer for CO2 BoxCox transformation."""
+class _CopyOption:
+    """Defaults the `copy` flag for transformers pickled before it existed."""
+
+    def __setstate__(self, state):
+        state.setdefault("copy", True)
+        super().__setstate__(state)
+
+
+class TransformCO2(_CopyOption, BaseEstimator, TransformerMixin):
+    """
+    Custom transformer for CO2 BoxCox transformation.
+    With copy=False, transform modifies the input frame in place.
+    """
     
-    def __init__(self):
+    def __init__(self, copy=True):
         self.lambda_ = None
+        self.copy = copy
 
     def fit(self, X, y=None):
-        X_copy = X.copy()
-        X_copy, self.lambda_ = transform_co2(X_copy)
+        # Only the fitted lambda is kept, so fit the CO2 column without copying the frame
+        _, self.lambda_ = boxcox(X["CO2"])
         return self
 
     def transform(self, X):
-        X_copy = X.copy()
+        X_copy = X.copy() if self.copy else X
         X_copy, _ = transform_co2(X_copy, trained_lambda=self.lambda_)
         return X_copy
 
 
-class DiscretizeLight(BaseEstimator, TransformerMixin):
-    """Custom transformer for Light discretization."""
+class DiscretizeLight(_CopyOption, BaseEstimator, TransformerMixin):
+    """
+    Custom transformer for Light discretization.
+    With copy=False, transform modifies the input frame in place.
+    """
     
-    def __init__(self, discretizer):
+    def __init__(self, discretizer, copy=True):
         self.discretizer = discretizer
+        self.copy = copy
 
     def fit(self, X, y=None):
-        X_copy = X.copy()
-        self.discretizer.fit(X_copy["Light"].to_numpy().reshape(-1, 1))
+        self.discretizer.fit(X["Light"].to_numpy().reshape(-1, 1))
         return self
 
     def transform(self, X):
-        X_copy = X.copy()
+        X_copy = X.copy() if self.copy else X
         X_copy["Light"] = self.discretizer.transform(X_copy["Light"].to_numpy().reshape(-1, 1))
         return X_copy
 
 
-class FeatureEngineer(BaseEstimator, TransformerMixin):
-    """Custom transformer for feature engineering."""
+class FeatureEngineer(_CopyOption, BaseEstimator, TransformerMixin):
+    """
+    Custom transformer for feature engineering.
+    With copy=False, the input frame is not copied first.
+    """
     
+    def __init__(self, copy=True):
+        self.copy = copy
+
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        X_copy = X.copy()
+        X_copy = X.copy() if self.copy else X
         return engineer_features(X_copy)
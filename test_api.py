@@ -45,6 +45,45 @@ def test_prediction(base_url: str = "http://localhost:8000"):
         return False
 
 
+def test_batch_prediction(base_url: str = "http://localhost:8000"):
+    """Test the batch prediction endpoint with several samples."""
+    print("Testing Batch Prediction Endpoint...")
+    
+    batch_data = {
+        "items": [
+            {
+                "datetime": "2015-02-04 17:51:00",
+                "Temperature": 23.18,
+                "Humidity": 27.272,
+                "Light": 426.0,
+                "CO2": 721.25,
+                "HumidityRatio": 0.00479
+            },
+            {
+                "datetime": "2015-02-04 07:00:00",
+                "Temperature": 20.5,
+                "Humidity": 30.0,
+                "Light": 0.0,
+                "CO2": 400.0,
+                "HumidityRatio": 0.004
+            }
+        ]
+    }
+    
+    response = requests.post(f"{base_url}/predict_batch", json=batch_data)
+    print(f"Status Code: {response.status_code}")
+    
+    if response.status_code == 200:
+        results = response.json()
+        for item, result in zip(batch_data["items"], results):
+            print(f"  {item['datetime']}: {result['label']} ({result['probability']:.2%})")
+        print()
+        return len(results) == len(batch_data["items"])
+    else:
+        print(f"Error: {response.text}\n")
+        return False
+
+
 def test_model_info(base_url: str = "http://localhost:8000"):
     """Test the model info endpoint."""
     print("Testing Model Info Endpoint...")
@@ -116,6 +155,9 @@ if __name__ == "__main__":
         # Test prediction
         test_prediction(BASE_URL)
         
+        # Test batch prediction
+        test_batch_prediction(BASE_URL)
+        
         # Test multiple predictions
         test_multiple_predictions(BASE_URL)
         